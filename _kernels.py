@@ -0,0 +1,59 @@
+#  Copyright 2019 Manuel Olguín Muñoz <manuel@olguin.se><molguin@kth.se>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Numba-compiled refill kernels for the delay distributions.
+
+These fill a preallocated float64 buffer in place, avoiding both the
+temporary array numpy allocates per refill and the Python-level call
+overhead of the Generator methods. Importing this module requires numba;
+distributions.py falls back to plain numpy when it is not installed.
+
+The explicit signatures force ahead-of-time compilation at import, so the
+first sample() call does not pay JIT latency; cache=True persists the
+compiled kernels across runs.
+"""
+
+import math
+
+import numpy as np
+from numba import njit
+
+
+@njit('void(float64[:], float64, float64)', cache=True, fastmath=True)
+def fill_normal(out, mean, sd):
+    for i in range(out.size):
+        out[i] = np.random.normal(mean, sd)
+
+
+@njit('void(float64[:], float64, float64)', cache=True, fastmath=True)
+def fill_normal_pos(out, mean, sd):
+    # strictly-positive variant with the clamp fused into the fill loop
+    for i in range(out.size):
+        v = np.random.normal(mean, sd)
+        out[i] = v if v > 0.0 else 0.0
+
+
+@njit('void(float64[:], float64)', cache=True, fastmath=True)
+def fill_exp(out, scale):
+    # inverse-CDF transform of uniforms; much cheaper than the
+    # np.random.exponential path
+    for i in range(out.size):
+        out[i] = -scale * math.log1p(-np.random.random())
+
+
+@njit('void(float64[:], float64, float64)', cache=True, fastmath=True)
+def fill_lognormal(out, mean, sd):
+    for i in range(out.size):
+        out[i] = np.random.lognormal(mean, sd)
@@ -12,30 +12,94 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
-from functools import partial
+from typing import Dict
 
 import numpy as np
 
 from defaults import DistributionDefaults
 
+try:
+    import _kernels
+except ImportError:
+    # numba is optional; fall back to the plain numpy refill paths
+    _kernels = None
+
+# single master generator; instances get independent child streams spawned
+# off it instead of each paying for full PCG64 state initialization
+_master_rng = np.random.default_rng()
+
+_REGISTRY: Dict[str, type] = {}
+
+
+def register(cls: type) -> type:
+    """
+    Registers a distribution class under its upper-cased name at definition
+    time, so lookups need no runtime scan of Distribution.__subclasses__().
+    """
+    _REGISTRY[cls.__name__.upper()] = cls
+    return cls
+
 
 class Distribution:
     """
-    Interface for statistical distributions
+    Interface for statistical distributions.
+
+    Samples are drawn from the underlying numpy distribution in blocks of
+    BUFFER_SIZE deviates at a time and handed out one by one, which amortizes
+    numpy's per-call dispatch overhead across the whole block.
+
+    Each instance owns an independent Generator stream spawned off a shared
+    master generator, which is faster than the legacy np.random.* functions
+    and keeps instances from contending over global RNG state. An instance
+    is NOT safe to share between threads, however: the buffer and index are
+    mutated without locking, so every thread sampling concurrently must use
+    its own instance (see clone()).
+
+    Subclasses bind a refill closure per instance with the buffer, RNG and
+    distribution parameters partially evaluated into its defaults, so the
+    steady-state refill does no attribute lookups.
     """
 
-    def sample(self) -> float:
+    BUFFER_SIZE = 4096
+
+    def __init__(self):
+        self._bufsize = Distribution.BUFFER_SIZE
+        self._buf = np.empty(self._bufsize, dtype=np.float64)
+        self._idx = self._bufsize
+        self._rng = _master_rng.spawn(1)[0]
+
+    def _refill(self) -> None:
         pass
 
+    def clone(self) -> 'Distribution':
+        pass
 
+    def sample(self) -> float:
+        if self._idx >= self._bufsize:
+            self._refill()
+            self._idx = 0
+        v = self._buf[self._idx]
+        self._idx += 1
+        return float(v)
+
+
+@register
 class ConstantDistribution(Distribution):
     def __init__(self, constant: float):
         super().__init__()
         self.constant = constant
+        # rebind sample on the instance to a closure over the prebuilt
+        # float object; skips the class-level method dispatch and returns
+        # the same object every call, with no buffer bookkeeping at all
+        const = float(constant)
+        self.sample = lambda _c=const: _c
 
     def sample(self) -> float:
         return self.constant
 
+    def clone(self) -> 'ConstantDistribution':
+        return ConstantDistribution(self.constant)
+
     def __repr__(self):
         return f'ConstantDistribution(constant={self.constant})'
 
@@ -43,6 +107,7 @@ class ConstantDistribution(Distribution):
         return f'Constant distribution (constant: {self.constant})'
 
 
+@register
 class GaussianDistribution(Distribution):
     def __init__(self, mean: float, std_dev: float,
                  strictly_positive: bool =
@@ -50,14 +115,41 @@ class GaussianDistribution(Distribution):
         super().__init__()
         self.mean = mean
         self.std_dev = std_dev
-        self.dist = partial(np.random.normal, loc=mean, scale=std_dev)
         self.positive = strictly_positive
+        self._refill = self._specialize_refill()
 
-    def sample(self) -> float:
-        if self.positive:
-            return max(self.dist(), 0.0)
+    def _specialize_refill(self):
+        # partial-evaluate the refill for this instance: the buffer, RNG and
+        # parameters are bound as defaults, so refills perform no attribute
+        # lookups and no branching on strictly_positive or kernel presence
+        if _kernels is not None:
+            fill = (_kernels.fill_normal_pos if self.positive
+                    else _kernels.fill_normal)
+
+            def _refill(fill=fill, buf=self._buf,
+                        mean=self.mean, sd=self.std_dev):
+                fill(buf, mean, sd)
+        elif self.positive:
+            # standard_normal is numpy's C ziggurat implementation; fill the
+            # preallocated buffer in place and apply loc/scale and the clamp
+            # with in-place ufuncs, so the steady state allocates nothing
+            def _refill(fill=self._rng.standard_normal, buf=self._buf,
+                        mean=self.mean, sd=self.std_dev, maximum=np.maximum):
+                fill(out=buf)
+                buf *= sd
+                buf += mean
+                maximum(buf, 0.0, out=buf)
         else:
-            return self.dist()
+            def _refill(fill=self._rng.standard_normal, buf=self._buf,
+                        mean=self.mean, sd=self.std_dev):
+                fill(out=buf)
+                buf *= sd
+                buf += mean
+
+        return _refill
+
+    def clone(self) -> 'GaussianDistribution':
+        return GaussianDistribution(self.mean, self.std_dev, self.positive)
 
     def __repr__(self):
         return f'GaussianDistribution(' \
@@ -70,14 +162,35 @@ class GaussianDistribution(Distribution):
                f'(mean: {self.mean}, standard deviation: {self.std_dev})'
 
 
+@register
 class ExponentialDistribution(Distribution):
     def __init__(self, scale: float):
         super().__init__()
         self.scale = scale
-        self.dist = partial(np.random.exponential, scale=scale)
+        self._refill = self._specialize_refill()
 
-    def sample(self) -> float:
-        return self.dist()
+    def _specialize_refill(self):
+        if _kernels is not None:
+            def _refill(fill=_kernels.fill_exp, buf=self._buf,
+                        scale=self.scale):
+                fill(buf, scale)
+        else:
+            # inverse-CDF transform of a uniform batch: uniforms are the
+            # cheapest RNG path and log1p vectorizes, which beats the
+            # per-value log inside Generator.exponential; every step writes
+            # into the preallocated buffer
+            def _refill(fill=self._rng.random, buf=self._buf,
+                        neg_scale=-self.scale, negative=np.negative,
+                        log1p=np.log1p, multiply=np.multiply):
+                fill(out=buf)
+                negative(buf, out=buf)
+                log1p(buf, out=buf)
+                multiply(buf, neg_scale, out=buf)
+
+        return _refill
+
+    def clone(self) -> 'ExponentialDistribution':
+        return ExponentialDistribution(self.scale)
 
     def __repr__(self):
         return f'ExponentialDistribution(scale={self.scale})'
@@ -86,15 +199,32 @@ class ExponentialDistribution(Distribution):
         return f'Exponential distribution (scale: {self.scale})'
 
 
+@register
 class LogNormalDistribution(Distribution):
     def __init__(self, mean: float, std_dev: float):
         super().__init__()
         self.mean = mean
         self.std_dev = std_dev
-        self.dist = partial(np.random.lognormal, mean=mean, sigma=std_dev)
+        self._refill = self._specialize_refill()
 
-    def sample(self) -> float:
-        return self.dist()
+    def _specialize_refill(self):
+        if _kernels is not None:
+            def _refill(fill=_kernels.fill_lognormal, buf=self._buf,
+                        mean=self.mean, sd=self.std_dev):
+                fill(buf, mean, sd)
+        else:
+            # exp of a scaled/shifted standard normal, all in place
+            def _refill(fill=self._rng.standard_normal, buf=self._buf,
+                        mean=self.mean, sd=self.std_dev, exp=np.exp):
+                fill(out=buf)
+                buf *= sd
+                buf += mean
+                exp(buf, out=buf)
+
+        return _refill
+
+    def clone(self) -> 'LogNormalDistribution':
+        return LogNormalDistribution(self.mean, self.std_dev)
 
     def __repr__(self):
         return f'LogNormalDistribution' \
@@ -105,17 +235,32 @@ class LogNormalDistribution(Distribution):
                f'(mean: {self.mean}, standard deviation: {self.std_dev})'
 
 
+@register
 class PoissonDistribution(Distribution):
     def __init__(self, mean: float):
         super().__init__()
         self.mean = mean
-        self.dist = partial(np.random.poisson, lam=mean)
+        self._refill = self._specialize_refill()
 
-    def sample(self) -> float:
-        return self.dist()
+    def _specialize_refill(self):
+        # drawing the whole buffer in one call makes numpy set up its
+        # rejection-sampling constants for this mean once per 4096 samples,
+        # so there is no per-sample setup cost left to cache away; copy into
+        # the float buffer so sample() never converts from int64
+        def _refill(poisson=self._rng.poisson, buf=self._buf,
+                    mean=self.mean, n=self._bufsize, copyto=np.copyto):
+            copyto(buf, poisson(mean, n), casting='unsafe')
+
+        return _refill
+
+    def clone(self) -> 'PoissonDistribution':
+        return PoissonDistribution(self.mean)
 
     def __repr__(self):
         return f'PoissonDistribution(mean={self.mean})'
 
     def __str__(self):
         return f'Poisson distribution (mean: {self.mean})'
+
+
+DISTRIBUTIONS = _REGISTRY
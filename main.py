@@ -14,24 +14,43 @@
 #  limitations under the License.
 
 import enum
-import ipaddress
 import logging
+import re
 import signal
-from functools import partial
 from inspect import Parameter, signature
 from threading import Event
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 import click
 import logzero
 import toml
 
 from defaults import RelayDefaults
-from distributions import Distribution
+from distributions import DISTRIBUTIONS, Distribution
 from relay import DuplexRelay
 
-avail_distributions = {cls.__name__.upper(): cls for cls in
-                       Distribution.__subclasses__()}
+avail_distributions = DISTRIBUTIONS
+
+
+def _build_distribution_ctors() -> Dict[str, Callable[[Dict], Distribution]]:
+    # precompute per-distribution constructors with the type casts for each
+    # TOML parameter resolved once here, instead of re-inspecting signatures
+    # for every proxy in a config file
+    ctors = {}
+    for dist_name, dist_cls in avail_distributions.items():
+        casts = {name: (param.annotation
+                        if param.annotation != Parameter.empty
+                        else (lambda x: x))
+                 for name, param in signature(dist_cls).parameters.items()}
+
+        def _ctor(params: Dict, cls=dist_cls, casts=casts) -> Distribution:
+            return cls(**{k: casts[k](v) for k, v in params.items()})
+
+        ctors[dist_name] = _ctor
+    return ctors
+
+
+dist_ctors = _build_distribution_ctors()
 
 
 class State:
@@ -43,16 +62,19 @@ class State:
         self.relay = relay
 
     def set_verbosity(self, value):
-        if value >= self.verbosity:
-            self.verbosity = value
-            if value == 1:
-                logzero.setup_default_logger(level=logging.WARNING)
-            elif value == 2:
-                logzero.setup_default_logger(level=logging.INFO)
-            elif value >= 3:
-                logzero.setup_default_logger(level=logging.DEBUG)
-            else:
-                logzero.setup_default_logger(level=logging.ERROR)
+        # explicitly ignore downgrades and repeats; just adjust the level on
+        # the default logger instead of rebuilding its handlers every time
+        if value <= self.verbosity:
+            return
+        self.verbosity = value
+        if value >= 3:
+            logzero.loglevel(logging.DEBUG)
+        elif value == 2:
+            logzero.loglevel(logging.INFO)
+        elif value == 1:
+            logzero.loglevel(logging.WARNING)
+        else:
+            logzero.loglevel(logging.ERROR)
 
 
 pass_state = click.make_pass_decorator(State, ensure=True)
@@ -71,16 +93,23 @@ def add_verbosity_option(fn):
     return fn
 
 
+_ADDR_RE = re.compile(r'^(\d{1,3})\.(\d{1,3})\.(\d{1,3})\.(\d{1,3}):(\d{1,5})$')
+
+
 def parse_IP_address(address: str) -> Tuple[str, int]:
-    try:
-        [ip, port] = address.split(':')
-        ipaddress.ip_address(ip)
-        port = int(port)
-        assert port <= 65535
-        return ip, port
-    except:
+    # a precompiled regex plus inline range checks; much cheaper than the
+    # general-purpose ipaddress parser when booting many proxies
+    match = _ADDR_RE.match(address)
+    if match is None:
+        raise RuntimeError(f'Could not parse {address} into a valid IP address')
+
+    *octets, port = (int(g) for g in match.groups())
+    if any(o > 255 for o in octets) or port > 65535:
         raise RuntimeError(f'Could not parse {address} into a valid IP address')
 
+    ip, _, _ = address.rpartition(':')
+    return ip, port
+
 
 class TOMLConfig(click.File):
     def __init__(self, *args, **kwargs):
@@ -156,28 +185,34 @@ def single_run_proxy_callback(state, dist_class, *args, **kwargs):
     state.relay.join()
 
 
-# dynamically add distributions as commands
-for dist_name, dist in avail_distributions.items():
-    sig = signature(dist)
-    params = dict(sig.parameters)
-
-    args = [
-        click.Option(param_decls=(f'--{name}',),
-                     required=(param.default == Parameter.empty),
-                     default=(param.default
-                              if param.default != Parameter.empty
-                              else None),
-                     show_default=True,
-                     nargs=1,
-                     type=param.annotation)
-        for name, param in params.items()
-    ]
-
-    cmd = click.Command(dist_name.lower(),
-                        callback=partial(single_run_proxy_callback,
-                                         dist_class=dist),
-                        params=args)
-    proxy.add_command(add_verbosity_option(cmd))
+def _register_single_run_commands():
+    # dynamically add distributions as commands; deferred to CLI startup so
+    # that importing this module does not pay for the signature reflection
+    for dist_name, dist in avail_distributions.items():
+        sig = signature(dist)
+        params = dict(sig.parameters)
+
+        args = [
+            click.Option(param_decls=(f'--{name}',),
+                         required=(param.default == Parameter.empty),
+                         default=(param.default
+                                  if param.default != Parameter.empty
+                                  else None),
+                         show_default=True,
+                         nargs=1,
+                         type=param.annotation)
+            for name, param in params.items()
+        ]
+
+        def _callback(*cb_args, dist_class=dist, **cb_kwargs):
+            return single_run_proxy_callback(*cb_args,
+                                             dist_class=dist_class,
+                                             **cb_kwargs)
+
+        cmd = click.Command(dist_name.lower(),
+                            callback=_callback,
+                            params=args)
+        proxy.add_command(add_verbosity_option(cmd))
 
 
 @cli.command()
@@ -185,8 +220,12 @@ for dist_name, dist in avail_distributions.items():
 @add_verbosity_option
 @click.argument('config', type=TOMLConfig())
 def from_file(_, config: Dict):
-    proxies: List[DuplexRelay] = list()
-    for p_config in config['proxies']:
+    # size the list up front instead of growing it append by append; all
+    # proxies are constructed before any is started, so a bad config entry
+    # aborts cleanly without leaving earlier relays running
+    p_configs = config['proxies']
+    proxies: List[Optional[DuplexRelay]] = [None] * len(p_configs)
+    for i, p_config in enumerate(p_configs):
         baddr, bport = parse_IP_address(p_config['bind_addr'])
         caddr, cport = parse_IP_address(p_config['connect_addr'])
         chunk_size = p_config.get('chunk_size', 4096)  # todo: defaults
@@ -194,27 +233,30 @@ def from_file(_, config: Dict):
         dist_name = p_config['distribution']['name'].upper()
         dist_params = p_config['distribution']['params']
 
-        dist = avail_distributions[dist_name](**dist_params)
+        dist = dist_ctors[dist_name](dist_params)
 
-        proxies.append(DuplexRelay(
+        proxies[i] = DuplexRelay(
             listen_host=baddr, listen_port=bport,
             connect_host=caddr, connect_port=cport,
             chunk_size=chunk_size,
             delay_dist=dist
-        ))
+        )
+
+    proxies_t: Tuple[DuplexRelay, ...] = tuple(proxies)
 
     def __sig_handler(*args, **kwargs):
-        for p in proxies:
+        for p in proxies_t:
             p.stop()
         exit(0)
 
     signal.signal(signal.SIGINT, __sig_handler)
 
-    for p in proxies:
+    for p in proxies_t:
         p.start()
 
     Event().wait()  # wait forever
 
 
 if __name__ == '__main__':
+    _register_single_run_commands()
     cli()
@@ -46,12 +46,20 @@ class SimplexRelay(threading.Thread):
         to_addr = self.conn_b.getpeername()
         logger.info('Relaying data from '
                     '{}:{} to {}:{}'.format(*from_addr, *to_addr))
-        while not self.shutdown_signal.is_set():
+        # hoist the bound methods used per chunk into locals; attribute
+        # lookups on every iteration add up at high chunk rates
+        recv = self.conn_a.recv
+        sendall = self.conn_b.sendall
+        sample = self.delay_dist.sample
+        wait = self.shutdown_signal.wait
+        shutting_down = self.shutdown_signal.is_set
+        chunk_size = self.chunk_size
+
+        while not shutting_down():
             try:
-                data = self.conn_a.recv(self.chunk_size)
-                self.shutdown_signal.wait(timeout=self.delay_dist.sample())
-                # time.sleep(self.delay_dist.sample())
-                self.conn_b.sendall(data)
+                data = recv(chunk_size)
+                wait(timeout=sample())
+                sendall(data)
             except socket.timeout:
                 pass
             except socket.error as e:
@@ -119,11 +127,14 @@ class DuplexRelay(threading.Thread):
                                         '{}:{}'.format(*addr_from,
                                                        *self.connect_addr))
 
+                            # distribution instances are not thread-safe
+                            # (shared buffer and index), so each direction
+                            # gets its own clone with an independent stream
                             relay_1 = SimplexRelay(conn_a, conn_b,
-                                                   self.delay_dist,
+                                                   self.delay_dist.clone(),
                                                    self.chunk_size)
                             relay_2 = SimplexRelay(conn_b, conn_a,
-                                                   self.delay_dist,
+                                                   self.delay_dist.clone(),
                                                    self.chunk_size)
 
                             relay_1.start()